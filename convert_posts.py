@@ -7,11 +7,181 @@ from datetime import datetime
 import urllib.request
 import urllib.parse
 import hashlib
+import base64
 import html
 import time
 
-def download_image(url, image_dir, post_id, post_title, image_counter):
-    """Download an image and return the local path"""
+from post_budget import run_with_budget, report_over_budget
+
+# Maximum size of a single downloaded image (override with MAX_IMAGE_BYTES)
+MAX_IMAGE_BYTES = int(os.environ.get('MAX_IMAGE_BYTES', 50 * 1024 * 1024))
+
+# Size of the chunks read from the network while downloading
+CHUNK_SIZE = 64 * 1024
+
+# Content hash -> filename of every image written during this run
+image_hashes = {}
+
+def stream_to_file(stream, local_path, content_length=None, max_size=None):
+    """Copy a stream into local_path chunk by chunk and return its SHA-256 hex digest.
+    
+    Data is written to a temporary file next to local_path and only renamed into
+    place once the transfer is complete, so a truncated or oversized download
+    never leaves a partial file behind.
+    """
+    if max_size is None:
+        max_size = MAX_IMAGE_BYTES
+    
+    expected = int(content_length) if content_length else None
+    if expected is not None and expected > max_size:
+        raise ValueError(f"image is {expected} bytes, larger than the {max_size} byte limit")
+    
+    tmp_path = local_path + '.part'
+    sha = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as out_file:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise ValueError(f"image exceeds the {max_size} byte limit")
+                sha.update(chunk)
+                out_file.write(chunk)
+        
+        if expected is not None and size != expected:
+            raise ValueError(f"truncated download: got {size} of {expected} bytes")
+        
+        os.replace(tmp_path, local_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    
+    return sha.hexdigest()
+
+def store_by_hash(digest, local_path, filename):
+    """Return the filename to reference for an image with the given content hash.
+    
+    local_path must be a file the caller has just written. If identical content
+    was already stored under another name, that new copy is removed and the
+    existing filename is returned instead.
+    """
+    existing = image_hashes.get(digest)
+    if existing and existing != filename and os.path.exists(os.path.join(os.path.dirname(local_path), existing)):
+        os.remove(local_path)
+        return existing
+    image_hashes[digest] = filename
+    return filename
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file, read in chunks"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def store_refreshed(digest, tmp_path, local_path, filename):
+    """Return the filename to reference for a re-downloaded image.
+    
+    tmp_path holds the new download; local_path is the existing file, which is
+    never modified because other posts may reference it.
+    """
+    if file_digest(local_path) == digest:
+        os.remove(tmp_path)
+        image_hashes.setdefault(digest, filename)
+        return filename
+    
+    # Changed content gets its own name, derived from the hash
+    base, ext = os.path.splitext(filename)
+    new_filename = f"{base}-{digest[:16]}{ext}"
+    new_path = os.path.join(os.path.dirname(local_path), new_filename)
+    if os.path.exists(new_path):
+        os.remove(tmp_path)
+        image_hashes.setdefault(digest, new_filename)
+        return new_filename
+    
+    os.replace(tmp_path, new_path)
+    return store_by_hash(digest, new_path, new_filename)
+
+# File extensions for the image types found in data: URIs
+DATA_URI_EXTENSIONS = {
+    'image/png': '.png',
+    'image/jpeg': '.jpg',
+    'image/jpg': '.jpg',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/bmp': '.bmp',
+    'image/svg+xml': '.svg',
+    'image/x-icon': '.ico',
+}
+
+class Base64Reader:
+    """File-like reader that decodes a base64 string a chunk at a time"""
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+        self.pending = ''
+    
+    def read(self, size=CHUNK_SIZE):
+        # Collect a multiple of 4 base64 characters, skipping whitespace
+        want = (size + 2) // 3 * 4
+        while len(self.pending) < want and self.pos < len(self.data):
+            piece = self.data[self.pos:self.pos + want]
+            self.pos += want
+            self.pending += re.sub(r'\s+', '', piece)
+        if self.pos >= len(self.data):
+            take = len(self.pending)
+        else:
+            take = len(self.pending) // 4 * 4
+        chunk, self.pending = self.pending[:take], self.pending[take:]
+        return base64.b64decode(chunk + '=' * (-len(chunk) % 4)) if chunk else b''
+
+def extract_data_uri(data_uri, image_dir):
+    """Write a base64 data: URI image to the image store and return its local path.
+    
+    Files are named by content hash, so the same image embedded in several
+    posts is stored once. Returns None for data URIs that are not base64 images.
+    """
+    header, sep, payload = data_uri.partition(',')
+    if not sep or ';base64' not in header.lower():
+        return None
+    ext = DATA_URI_EXTENSIONS.get(header[5:].split(';')[0].strip().lower())
+    if not ext:
+        return None
+    
+    if '%' in payload:
+        payload = urllib.parse.unquote(payload)
+    
+    tmp_path = os.path.join(image_dir, f".inline-{os.getpid()}")
+    digest = stream_to_file(Base64Reader(payload), tmp_path)
+    
+    filename = f"inline-{digest[:16]}{ext}"
+    local_path = os.path.join(image_dir, filename)
+    if os.path.exists(local_path):
+        # A content-addressed file from an earlier run is canonical; posts
+        # already reference it, so it must never be deduplicated away
+        os.remove(tmp_path)
+        image_hashes[digest] = filename
+        return f"/assets/images/{filename}"
+    
+    os.replace(tmp_path, local_path)
+    filename = store_by_hash(digest, local_path, filename)
+    return f"/assets/images/{filename}"
+
+def download_image(url, image_dir, post_id, post_title, image_counter, refresh=False):
+    """Download an image and return the local path
+    
+    With refresh, an image already on disk is downloaded again. If its content
+    changed, the new copy is stored under a content-addressed name and only
+    this post is pointed at it; the old file is left for other posts.
+    """
     try:
         # Create a sanitized filename from post title
         safe_title = re.sub(r'[^a-zA-Z0-9]+', '-', post_title.lower()).strip('-')
@@ -30,7 +200,8 @@ def download_image(url, image_dir, post_id, post_title, image_counter):
         local_path = os.path.join(image_dir, filename)
         
         # Skip if already downloaded
-        if os.path.exists(local_path):
+        existed = os.path.exists(local_path)
+        if existed and not refresh:
             return f"/assets/images/{filename}"
             
         # Download the image
@@ -40,8 +211,21 @@ def download_image(url, image_dir, post_id, post_title, image_counter):
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
         req = urllib.request.Request(url, headers=headers)
         
-        with urllib.request.urlopen(req, timeout=30) as response, open(local_path, 'wb') as out_file:
-            out_file.write(response.read())
+        if existed:
+            # Other posts may have been pointed at this file by store_by_hash,
+            # so a refreshed image never overwrites it
+            target_path = os.path.join(image_dir, f".refresh-{os.getpid()}")
+        else:
+            target_path = local_path
+        
+        with urllib.request.urlopen(req, timeout=30) as response:
+            digest = stream_to_file(response, target_path, response.headers.get('Content-Length'))
+        
+        if existed:
+            filename = store_refreshed(digest, target_path, local_path, filename)
+        else:
+            # Reuse an identical image already downloaded for another post
+            filename = store_by_hash(digest, local_path, filename)
             
         # Add a small delay to avoid rate limiting
         time.sleep(0.5)
@@ -51,7 +235,7 @@ def download_image(url, image_dir, post_id, post_title, image_counter):
         print(f"Error downloading image {url}: {e}")
         return url  # Return original URL if download fails
 
-def process_content(content, image_dir, post_id, post_title):
+def process_content(content, image_dir, post_id, post_title, refresh_images=False):
     """Process post content to download images and fix formatting"""
     # Replace Blogger image references with local paths
     img_pattern = re.compile(r'<img[^>]+src=["\']([^"\']+)["\'][^>]*>')
@@ -64,12 +248,17 @@ def process_content(content, image_dir, post_id, post_title):
         img_tag = match.group(0)
         img_url = match.group(1)
         
-        # Skip data URLs
+        # Move inline data: images into the image store
         if img_url.startswith('data:'):
-            return img_tag
+            try:
+                local_path = extract_data_uri(img_url, image_dir)
+            except Exception as e:
+                print(f"Error extracting inline image: {e}")
+                local_path = None
+            return img_tag.replace(img_url, local_path) if local_path else img_tag
             
         # Download the image and get local path
-        local_path = download_image(img_url, image_dir, post_id, post_title, image_counter)
+        local_path = download_image(img_url, image_dir, post_id, post_title, image_counter, refresh_images)
         
         # Increment counter for next image
         image_counter += 1
@@ -80,6 +269,12 @@ def process_content(content, image_dir, post_id, post_title):
     # Replace image URLs
     content = img_pattern.sub(replace_image, content)
     
+    # Clean up the markup in a supervised worker so a pathological post cannot
+    # stall the whole run
+    return run_with_budget(clean_html, (content,), strip_formatting, post_id)
+
+def clean_html(content):
+    """Fix formatting, highlight code blocks and remove inline styles"""
     # Fix common HTML issues
     content = content.replace('<br>', '<br />')
     
@@ -134,130 +329,163 @@ def process_content(content, image_dir, post_id, post_title):
     
     return content
 
+def strip_formatting(content):
+    """Linear-time fallback for clean_html, used when a post exceeds its budget.
+    
+    Drops font, span and div tags one by one instead of matching pairs, and
+    leaves code blocks without language hints.
+    """
+    content = content.replace('<br>', '<br />')
+    content = re.sub(r'style=["\'][^"\']*["\']', '', content)
+    content = re.sub(r'</?(?:font|span|div)\b[^>]*>', '', content)
+    return content
+
 def add_excerpt_separator(content):
     """No longer adding excerpt separators as we're showing full content"""
     # We're no longer adding excerpt separators
     return content
 
-def convert_blogger_to_jekyll(xml_file, posts_dir, image_dir):
-    """Convert Blogger XML export to Jekyll posts"""
-    # Create directories if they don't exist
-    os.makedirs(posts_dir, exist_ok=True)
-    os.makedirs(image_dir, exist_ok=True)
-    
-    # Parse the XML file
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
+# Namespaces used in Blogger exports and feeds
+NAMESPACES = {
+    '': 'http://www.w3.org/2005/Atom',
+    'app': 'http://purl.org/atom/app#',
+}
+
+def read_entry(entry, post_index=0, assume_post=False, namespaces=NAMESPACES):
+    """Read the metadata and raw content of a Blogger <entry>.
     
-    # Define namespaces
-    namespaces = {
-        '': 'http://www.w3.org/2005/Atom',
-        'app': 'http://purl.org/atom/app#',
-    }
+    Returns a dict with post_id, title, date_str, time_str, tags, filename and
+    content, or None if the entry is not a publishable post.
+    """
+    # Skip non-posts (like comments, templates, etc.)
+    kind = None
+    is_post = False
     
-    # Find all entries that are posts (not pages or comments)
-    entries = root.findall('entry', namespaces)
-    post_count = 0
+    # Check if this is a post by looking at categories
+    categories = entry.findall('category', namespaces)
+    for category in categories:
+        term = category.get('term', '')
+        if 'kind#post' in term:
+            kind = 'post'
+            is_post = True
+            break
     
-    for entry in entries:
-        # Skip non-posts (like comments, templates, etc.)
-        kind = None
-        is_post = False
-        
-        # Check if this is a post by looking at categories
-        categories = entry.findall('category', namespaces)
-        for category in categories:
-            term = category.get('term', '')
-            if 'kind#post' in term:
-                kind = 'post'
-                is_post = True
-                break
-        
-        # Skip if not a post
-        if not is_post:
-            continue
-            
-        # Skip if it's a comment (has thr:in-reply-to element)
-        reply_to = entry.find('{http://purl.org/syndication/thread/1.0}in-reply-to')
-        if reply_to is not None:
-            continue
-            
-        # Extract post ID
-        id_elem = entry.find('id', namespaces)
-        post_id = id_elem.text.split('-')[-1] if id_elem is not None else f"post-{post_count}"
+    # Skip if not a post (entries from a posts-only feed carry no kind category)
+    if not is_post and not assume_post:
+        return None
         
-        # Extract post title
-        title_elem = entry.find('title', namespaces)
-        title = title_elem.text if title_elem is not None and title_elem.text is not None else f"Untitled-{post_id}"
+    # Skip if it's a comment (has thr:in-reply-to element)
+    reply_to = entry.find('{http://purl.org/syndication/thread/1.0}in-reply-to')
+    if reply_to is not None:
+        return None
         
-        # Skip posts with titles that look like they're from the theme
-        if title.startswith("Layout:") or title.startswith("Post:") or title.startswith("Markup:"):
-            continue
-            
-        # Skip untitled posts
-        if title.startswith("Untitled-"):
-            continue
-        
-        # Clean title for YAML
-        title = title.replace('"', '\\"').replace(":", "&#58;")
+    # Extract post ID
+    id_elem = entry.find('id', namespaces)
+    post_id = id_elem.text.split('-')[-1] if id_elem is not None else f"post-{post_index}"
+    
+    # Extract post title
+    title_elem = entry.find('title', namespaces)
+    title = title_elem.text if title_elem is not None and title_elem.text is not None else f"Untitled-{post_id}"
+    
+    # Skip posts with titles that look like they're from the theme
+    if title.startswith("Layout:") or title.startswith("Post:") or title.startswith("Markup:"):
+        return None
         
-        # Extract published date
-        published_elem = entry.find('published', namespaces)
-        if published_elem is not None:
-            published_date = published_elem.text
-            # Convert to Jekyll date format (YYYY-MM-DD)
+    # Skip untitled posts
+    if title.startswith("Untitled-"):
+        return None
+    
+    # Clean title for YAML
+    title = title.replace('"', '\\"').replace(":", "&#58;")
+    
+    # Extract published date
+    published_elem = entry.find('published', namespaces)
+    if published_elem is not None:
+        published_date = published_elem.text
+        # Convert to Jekyll date format (YYYY-MM-DD)
+        try:
+            dt = datetime.strptime(published_date, "%Y-%m-%dT%H:%M:%S.%f%z")
+        except ValueError:
             try:
-                dt = datetime.strptime(published_date, "%Y-%m-%dT%H:%M:%S.%f%z")
+                dt = datetime.strptime(published_date, "%Y-%m-%dT%H:%M:%S%z")
             except ValueError:
-                try:
-                    dt = datetime.strptime(published_date, "%Y-%m-%dT%H:%M:%S%z")
-                except ValueError:
-                    dt = datetime.now()
-            
-            # Use UTC date for filename to avoid timezone issues
-            date_str = dt.strftime("%Y-%m-%d")
-            
-            # For the front matter, explicitly set the timezone to UTC
-            # This ensures Jekyll displays the same date as the filename
-            time_str = dt.strftime("%H:%M:%S +0000")
-        else:
-            date_str = datetime.now().strftime("%Y-%m-%d")
-            time_str = datetime.now().strftime("%H:%M:%S +0000")
-        
-        # Extract content
-        content_elem = entry.find('content', namespaces)
-        if content_elem is not None:
-            content = content_elem.text or ""
-        else:
-            content = ""
-            
-        # Skip if content is empty or too short (likely not a real post)
-        if not content or len(content.strip()) < 10:
-            continue
-            
-        # Unescape HTML entities in content
-        content = html.unescape(content)
-        
-        # Process content (download images, fix formatting, remove inline styles)
-        content = process_content(content, image_dir, post_id, title)
+                dt = datetime.now()
         
-        # We no longer add excerpt separators as we're showing full content
-        # content = add_excerpt_separator(content)
+        # Use UTC date for filename to avoid timezone issues
+        date_str = dt.strftime("%Y-%m-%d")
         
-        # Extract tags/labels
-        tags = []
-        categories = entry.findall('category', namespaces)
-        for category in categories:
-            term = category.get('term', '')
-            scheme = category.get('scheme', '')
-            if 'kind#post' not in term and 'kind#' not in term and term:
-                tags.append(term)
+        # For the front matter, explicitly set the timezone to UTC
+        # This ensures Jekyll displays the same date as the filename
+        time_str = dt.strftime("%H:%M:%S +0000")
+    else:
+        date_str = datetime.now().strftime("%Y-%m-%d")
+        time_str = datetime.now().strftime("%H:%M:%S +0000")
+    
+    # Extract content
+    content_elem = entry.find('content', namespaces)
+    if content_elem is not None:
+        content = content_elem.text or ""
+    else:
+        content = ""
         
-        # Create slug from title
-        slug = re.sub(r'[^a-zA-Z0-9]+', '-', title.lower()).strip('-')
+    # Skip if content is empty or too short (likely not a real post)
+    if not content or len(content.strip()) < 10:
+        return None
         
-        # Create Jekyll front matter - remove the blog category
-        front_matter = f"""---
+    # Unescape HTML entities in content
+    content = html.unescape(content)
+    
+    # Extract tags/labels
+    tags = []
+    categories = entry.findall('category', namespaces)
+    for category in categories:
+        term = category.get('term', '')
+        scheme = category.get('scheme', '')
+        if 'kind#post' not in term and 'kind#' not in term and term:
+            tags.append(term)
+    
+    # Create slug from title
+    slug = re.sub(r'[^a-zA-Z0-9]+', '-', title.lower()).strip('-')
+    
+    # Create Jekyll post filename
+    filename = f"{date_str}-{slug}.md"
+    
+    return {
+        'post_id': post_id,
+        'title': title,
+        'date_str': date_str,
+        'time_str': time_str,
+        'tags': tags,
+        'filename': filename,
+        'content': content,
+    }
+
+def convert_entry(entry, posts_dir, image_dir, post_index=0, assume_post=False, refresh_images=False,
+                  filename=None, namespaces=NAMESPACES):
+    """Convert a single Blogger <entry> to a Jekyll post and return its path.
+    
+    Returns None if the entry is not a publishable post. With refresh_images,
+    images already on disk are downloaded again, e.g. for an edited post.
+    filename overrides the post filename derived from the date and title.
+    """
+    post = read_entry(entry, post_index, assume_post, namespaces)
+    if post is None:
+        return None
+    
+    title = post['title']
+    date_str = post['date_str']
+    time_str = post['time_str']
+    tags = post['tags']
+    filename = filename or post['filename']
+    
+    # Process content (download images, fix formatting, remove inline styles)
+    content = process_content(post['content'], image_dir, post['post_id'], title, refresh_images)
+    
+    # We no longer add excerpt separators as we're showing full content
+    # content = add_excerpt_separator(content)
+    
+    # Create Jekyll front matter - remove the blog category
+    front_matter = f"""---
 title: "{title}"
 date: {date_str} {time_str}
 tags:
@@ -265,18 +493,38 @@ tags:
 ---
 
 """
+    
+    post_path = os.path.join(posts_dir, filename)
+    
+    # Write Jekyll post
+    with open(post_path, 'w', encoding='utf-8') as f:
+        f.write(front_matter + content)
         
-        # Create Jekyll post filename
-        filename = f"{date_str}-{slug}.md"
-        post_path = os.path.join(posts_dir, filename)
-        
-        # Write Jekyll post
-        with open(post_path, 'w', encoding='utf-8') as f:
-            f.write(front_matter + content)
-            
-        post_count += 1
-        print(f"Converted post: {title}")
+    print(f"Converted post: {title}")
+    
+    return post_path
+
+
+
+def convert_blogger_to_jekyll(xml_file, posts_dir, image_dir):
+    """Convert Blogger XML export to Jekyll posts"""
+    # Create directories if they don't exist
+    os.makedirs(posts_dir, exist_ok=True)
+    os.makedirs(image_dir, exist_ok=True)
+    
+    # Parse the XML file
+    tree = ET.parse(xml_file)
+    root = tree.getroot()
+    
+    # Find all entries that are posts (not pages or comments)
+    entries = root.findall('entry', NAMESPACES)
+    post_count = 0
+    
+    for entry in entries:
+        if convert_entry(entry, posts_dir, image_dir, post_count):
+            post_count += 1
     
+    report_over_budget("HTML cleanup")
     print(f"Converted {post_count} posts to Jekyll format")
 
 if __name__ == "__main__":
@@ -6,14 +6,15 @@ echo "Starting Blogger to Jekyll migration..."
 # Run the migration script
 /app/migration/migrate.sh
 
-# Clean up the output directory before copying new files
-echo "Cleaning up output directory..."
-if [ -d "/app/output" ] && [ "$(ls -A /app/output)" ]; then
-  rm -rf /app/output/*
-fi
+# Sync the generated Jekyll site into the mounted volume, copying only
+# changed files and removing stale ones
+echo "Publishing Jekyll site to output directory..."
+python3 /app/migration/publish_site.py /app/jekyll_site /app/output
 
-# Copy the generated Jekyll site to the mounted volume
-echo "Copying Jekyll site to output directory..."
-cp -r /app/jekyll_site/* /app/output/
+# Optionally export the site as a single archive (.tar.gz or .tar.zst)
+if [ -n "${SITE_ARCHIVE}" ]; then
+  echo "Exporting Jekyll site to ${SITE_ARCHIVE}..."
+  python3 /app/migration/publish_site.py --archive /app/jekyll_site "${SITE_ARCHIVE}"
+fi
 
 echo "Migration completed successfully!" 
\ No newline at end of file
@@ -3,36 +3,64 @@ import sys
 import xml.etree.ElementTree as ET
 import re
 
-def extract_blog_info(xml_file):
-    # Parse the XML file
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+GD_NS = '{http://schemas.google.com/g/2005}'
+
+def read_blog_header(xml_file):
+    """Read the feed metadata that precedes the first <entry> without parsing the rest.
     
-    # Define namespaces
-    namespaces = {
-        '': 'http://www.w3.org/2005/Atom',
-        'gd': 'http://schemas.google.com/g/2005'
+    Returns a dict with the blog title and the author's name, email and image.
+    Parsing stops as soon as the first entry starts, so the cost does not grow
+    with the size of the export.
+    """
+    header = {
+        'title': "My Blog",
+        'author_name': "",
+        'author_email': "",
+        'author_image': "",
     }
     
-    # Extract blog title
-    title_elem = root.find('title', namespaces)
-    blog_title = title_elem.text if title_elem is not None else "My Blog"
+    # Track the path of open elements so only feed-level children are read
+    path = []
+    has_author = False
+    
+    with open(xml_file, 'rb') as f:
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                if elem.tag == ATOM_NS + 'entry':
+                    break
+                path.append(elem.tag)
+                continue
+            
+            path.pop()
+            parent = path[-1] if path else None
+            
+            if parent == ATOM_NS + 'feed':
+                if elem.tag == ATOM_NS + 'title' and elem.text:
+                    header['title'] = elem.text
+                elif elem.tag == ATOM_NS + 'author':
+                    has_author = True
+            elif parent == ATOM_NS + 'author' and len(path) == 2:
+                if elem.tag == ATOM_NS + 'name' and elem.text:
+                    header['author_name'] = elem.text
+                elif elem.tag == ATOM_NS + 'email' and elem.text:
+                    header['author_email'] = elem.text
+                elif elem.tag == GD_NS + 'image':
+                    header['author_image'] = elem.get('src', '')
     
-    # Extract author information
-    author_elem = root.find('author', namespaces)
-    author_name = ""
-    author_email = ""
-    author_image = ""
+    if has_author and not header['author_name']:
+        header['author_name'] = "Author"
+    
+    return header
+
+def extract_blog_info(xml_file):
+    # Read only the feed header, not the whole export
+    header = read_blog_header(xml_file)
     
-    if author_elem is not None:
-        name_elem = author_elem.find('n')
-        email_elem = author_elem.find('email')
-        image_elem = author_elem.find('gd:image', namespaces)
-        
-        author_name = name_elem.text if name_elem is not None else "Author"
-        author_email = email_elem.text if email_elem is not None else ""
-        if image_elem is not None:
-            author_image = image_elem.get('src', '')
+    blog_title = header['title']
+    author_name = header['author_name']
+    author_email = header['author_email']
+    author_image = header['author_image']
     
     # Generate Jekyll _config.yml
     config = f"""# Minimal Mistakes Jekyll Theme Configuration
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+import sys
+import os
+import re
+import html
+import hashlib
+import shutil
+from datetime import datetime
+
+# Number of posts listed on each archive page
+POSTS_PER_PAGE = 50
+
+# Regular expression to extract date and slug from filename (YYYY-MM-DD-title.md)
+POST_PATTERN = re.compile(r'^(\d{4})-(\d{2})-(\d{2})-(.*)\.(md|html)$')
+
+def read_front_matter(post_path):
+    """Read title, date and tags from a post's front matter without loading the body"""
+    meta = {'title': '', 'date': '', 'tags': []}
+    with open(post_path, 'r', encoding='utf-8') as f:
+        if f.readline().strip() != '---':
+            return meta
+        in_tags = False
+        for line in f:
+            line = line.rstrip('\n')
+            if line.strip() == '---':
+                break
+            if in_tags and line.startswith('  - '):
+                meta['tags'].append(line[4:].strip())
+                continue
+            in_tags = False
+            if line.startswith('title:'):
+                title = line[len('title:'):].strip()
+                if title.startswith('"') and title.endswith('"'):
+                    title = title[1:-1].replace('\\"', '"')
+                meta['title'] = html.unescape(title)
+            elif line.startswith('date:'):
+                meta['date'] = line[len('date:'):].strip()
+            elif line.startswith('tags:'):
+                in_tags = True
+    return meta
+
+def collect_posts(posts_dir):
+    """Return metadata for every post under posts_dir, newest first"""
+    posts = []
+    for root, _, files in os.walk(posts_dir):
+        for file in files:
+            match = POST_PATTERN.match(file)
+            if not match:
+                continue
+            year, month, day, slug = match.group(1), match.group(2), match.group(3), match.group(4)
+            meta = read_front_matter(os.path.join(root, file))
+            
+            # Jekyll takes the permalink date from the front matter when present
+            date_match = re.match(r'^(\d{4})-(\d{2})-(\d{2})', meta['date'])
+            if date_match:
+                year, month, day = date_match.groups()
+            
+            posts.append({
+                'title': meta['title'] or slug.replace('-', ' ').title(),
+                'year': year,
+                'month': month,
+                'day': day,
+                'tags': meta['tags'] or ['uncategorized'],
+                'url': f"/{year}/{month}/{day}/{slug}/",
+                'sort_key': (meta['date'] or f"{year}-{month}-{day}", file),
+            })
+    
+    posts.sort(key=lambda post: post['sort_key'], reverse=True)
+    return posts
+
+def tag_slug(tag):
+    """Slugify a tag like Jekyll's default slugify, keeping Unicode letters and digits"""
+    slug = re.sub(r'[\W_]+', '-', tag.lower()).strip('-')
+    if not slug:
+        # Tags made only of punctuation still need distinct pages
+        slug = 'tag-' + hashlib.sha1(tag.encode('utf-8')).hexdigest()[:8]
+    return slug
+
+def month_name(year, month):
+    return datetime(int(year), int(month), 1).strftime("%B")
+
+def render_post_list(posts, group_by_month=False):
+    """Render posts as static HTML lists, optionally under year/month headings"""
+    lines = []
+    current = None
+    for post in posts:
+        group = (post['year'], post['month']) if group_by_month else None
+        if group != current or not lines:
+            if lines:
+                lines.append("</ul>")
+            if group_by_month:
+                if current is None or current[0] != post['year']:
+                    lines.append(f'<h2 id="{post["year"]}">{post["year"]}</h2>')
+                lines.append(f'<h3 id="{post["year"]}-{post["month"]}">{month_name(post["year"], post["month"])}</h3>')
+            lines.append("<ul>")
+            current = group
+        date = datetime(int(post['year']), int(post['month']), int(post['day'])).strftime("%B %d, %Y")
+        lines.append(f'  <li><a href="{post["url"]}">{html.escape(post["title"])}</a> <small>{date}</small></li>')
+    if lines:
+        lines.append("</ul>")
+    return "\n".join(lines)
+
+def render_pager(base_url, page, page_count):
+    """Render previous/next links between the pages of one archive"""
+    if page_count <= 1:
+        return ""
+    links = []
+    if page > 1:
+        prev_url = base_url if page == 2 else f"{base_url}page{page - 1}/"
+        links.append(f'<a href="{prev_url}">Previous</a>')
+    links.append(f"Page {page} of {page_count}")
+    if page < page_count:
+        links.append(f'<a href="{base_url}page{page + 1}/">Next</a>')
+    return '\n<nav class="pagination">' + " | ".join(links) + "</nav>\n"
+
+def write_page(path, title, permalink, body):
+    title = title.replace('"', '\\"')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"""---
+layout: archive
+title: "{title}"
+permalink: {permalink}
+author_profile: false
+---
+
+{body}
+""")
+
+def write_paginated(out_dir, name, title, base_url, posts, group_by_month=False, per_page=POSTS_PER_PAGE):
+    """Write one archive split into pages of per_page posts"""
+    page_count = max(1, (len(posts) + per_page - 1) // per_page)
+    for page in range(1, page_count + 1):
+        page_posts = posts[(page - 1) * per_page:page * per_page]
+        permalink = base_url if page == 1 else f"{base_url}page{page}/"
+        filename = f"{name}.html" if page == 1 else f"{name}-page{page}.html"
+        body = render_post_list(page_posts, group_by_month) + render_pager(base_url, page, page_count)
+        write_page(os.path.join(out_dir, filename), title, permalink, body)
+    return page_count
+
+def generate_archives(posts_dir, per_page=POSTS_PER_PAGE):
+    """Render year, month and tag archives as static pages from post front matter
+    
+    Pages are written to _pages/archives next to the posts directory and are
+    regenerated from scratch on every call.
+    """
+    posts = collect_posts(posts_dir)
+    
+    out_dir = os.path.join(os.path.dirname(os.path.abspath(posts_dir)), "_pages", "archives")
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+    
+    page_count = write_paginated(out_dir, "archives", "Archives", "/archives/", posts, True, per_page)
+    
+    # Group posts by year, month and tag; posts are already sorted newest first
+    by_year = {}
+    by_month = {}
+    by_tag = {}
+    tag_names = {}
+    for post in posts:
+        by_year.setdefault(post['year'], []).append(post)
+        by_month.setdefault((post['year'], post['month']), []).append(post)
+        for tag in post['tags']:
+            # Tags that slugify to the same name share one page
+            slug = tag_slug(tag)
+            tag_names.setdefault(slug, tag)
+            tag_posts = by_tag.setdefault(slug, [])
+            if not tag_posts or tag_posts[-1] is not post:
+                tag_posts.append(post)
+    
+    for year, year_posts in by_year.items():
+        months = sorted({post['month'] for post in year_posts})
+        body = "<ul>\n" + "\n".join(
+            f'  <li><a href="/{year}/{m}/">{month_name(year, m)}</a> ({len(by_month[(year, m)])})</li>' for m in months
+        ) + "\n</ul>"
+        write_page(os.path.join(out_dir, f"{year}.html"), f"Posts from {year}", f"/{year}/", body)
+    
+    for (year, month), month_posts in by_month.items():
+        page_count += write_paginated(out_dir, f"{year}-{month}", f"Posts from {month_name(year, month)} {year}",
+                                      f"/{year}/{month}/", month_posts, per_page=per_page)
+    
+    tag_links = []
+    for slug in sorted(by_tag):
+        tag = tag_names[slug]
+        page_count += write_paginated(out_dir, f"tag-{slug}", f"Posts tagged {tag}", f"/tags/{slug}/",
+                                      by_tag[slug], per_page=per_page)
+        # The theme links post tags to /tags/#slug, so each entry carries an anchor
+        tag_links.append(f'  <li id="{html.escape(slug)}"><a href="/tags/{slug}/">{html.escape(tag)}</a> ({len(by_tag[slug])})</li>')
+    write_page(os.path.join(out_dir, "tags.html"), "Tags", "/tags/", "<ul>\n" + "\n".join(tag_links) + "\n</ul>")
+    
+    page_count += len(by_year) + 1
+    print(f"Generated {page_count} archive pages for {len(posts)} posts")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python generate_archives.py <posts_dir>")
+        sys.exit(1)
+    
+    posts_dir = sys.argv[1]
+    generate_archives(posts_dir)
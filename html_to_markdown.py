@@ -5,6 +5,8 @@ import re
 import html
 import glob
 
+from post_budget import run_with_budget, report_over_budget
+
 def convert_html_to_markdown(content):
     """Convert HTML content to pure markdown using regex"""
     # Remove HTML comments
@@ -121,6 +123,18 @@ def convert_html_to_markdown(content):
     
     return content.strip()
 
+def strip_html_to_markdown(content):
+    """Linear-time fallback for convert_html_to_markdown, used when a post exceeds its budget.
+    
+    Keeps paragraph and line breaks but drops all other markup.
+    """
+    content = re.sub(r'<br\s*/?>', '\n', content)
+    content = re.sub(r'</(?:p|div|h[1-6]|li|pre|blockquote)\s*>', '\n\n', content)
+    content = re.sub(r'<[^>]*>', '', content)
+    content = re.sub(r'\n{3,}', '\n\n', content)
+    content = html.unescape(content)
+    return content.strip()
+
 def process_markdown_files(directory):
     """Process all markdown files in the given directory and its subdirectories"""
     # Get all markdown files
@@ -149,7 +163,7 @@ def process_markdown_files(directory):
             html_content = content
         
         # Convert HTML to markdown
-        markdown_content = convert_html_to_markdown(html_content)
+        markdown_content = run_with_budget(convert_html_to_markdown, (html_content,), strip_html_to_markdown, md_file)
         
         # Write the file back
         with open(md_file, 'w', encoding='utf-8') as f:
@@ -157,6 +171,7 @@ def process_markdown_files(directory):
         
         print(f"Converted {md_file} to pure markdown")
     
+    report_over_budget("Markdown conversion")
     print(f"Processed {len(md_files)} markdown files successfully!")
 
 if __name__ == "__main__":
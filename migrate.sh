@@ -652,6 +652,9 @@ python3 /app/migration/convert_posts.py "${BLOG_XML}" "${POSTS_DIR}" "${IMAGES_D
 echo "Organizing posts by year and month..."
 python3 /app/migration/organize_posts.py "${POSTS_DIR}"
 
+# Record the converted posts so sync_posts.py can update them later
+python3 /app/migration/sync_posts.py --seed "${BLOG_XML}" "${POSTS_DIR}"
+
 # Convert HTML in markdown files to pure markdown
 echo "Converting HTML in markdown files to pure markdown..."
 python3 /app/migration/html_to_markdown.py "${POSTS_DIR}"
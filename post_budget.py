@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+import os
+import sys
+import atexit
+import multiprocessing
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Wall time in seconds a single post may spend in conversion (0 disables the budget)
+POST_TIME_LIMIT = float(os.environ.get('POST_TIME_LIMIT', 30))
+
+# Address space in MB the conversion worker may use on top of what it has at
+# startup (0 for no limit)
+POST_MEMORY_LIMIT = int(os.environ.get('POST_MEMORY_LIMIT', 1024))
+
+def _address_space_in_use():
+    """Return the current virtual memory size of this process in bytes, or 0 if unknown"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmSize:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return 0
+
+def _worker_main(conn, memory_limit):
+    """Run conversion calls sent over conn until the parent closes it"""
+    if memory_limit and resource is not None:
+        # The budget is counted on top of the interpreter's own footprint
+        limit = _address_space_in_use() + memory_limit * 1024 * 1024
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        except MemoryError:
+            # A post too large to even unpickle within the budget
+            conn.send(('memory limit exceeded', None))
+            continue
+        if message is None:
+            break
+        
+        func, args = message
+        try:
+            conn.send(('ok', func(*args)))
+        except MemoryError:
+            conn.send(('memory limit exceeded', None))
+        except Exception as e:
+            conn.send((f"error: {e}", None))
+
+class BudgetRunner:
+    """Run conversion functions in a supervised worker with a time and memory budget.
+    
+    The worker process is reused between posts and only restarted after it is
+    killed for running over time, so the per-post overhead is one round trip.
+    """
+    def __init__(self, time_limit=POST_TIME_LIMIT, memory_limit=POST_MEMORY_LIMIT):
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
+        self.process = None
+        self.conn = None
+        self.over_budget = []
+    
+    def start(self):
+        # Never fork the converting process itself: by the time the first post
+        # is converted it may hold the whole parsed export, which the worker
+        # would inherit. A forkserver (or spawn) starts from a fresh interpreter.
+        methods = multiprocessing.get_all_start_methods()
+        ctx = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        sys.stdout.flush()
+        sys.stderr.flush()
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, self.memory_limit), daemon=True)
+        self.process.start()
+        child_conn.close()
+    
+    def stop(self):
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+        self.process = None
+        self.conn = None
+    
+    def run(self, func, args, fallback, label):
+        """Return func(*args), or fallback(*args) if the call exceeds its budget"""
+        if self.time_limit <= 0:
+            return func(*args)
+        
+        if self.process is None or not self.process.is_alive():
+            self.stop()
+            self.start()
+        
+        try:
+            self.conn.send((func, args))
+            if self.conn.poll(self.time_limit):
+                status, result = self.conn.recv()
+            else:
+                status = f"over {self.time_limit:g}s time limit"
+                self.stop()
+        except (EOFError, OSError):
+            # The worker died, typically killed for using too much memory
+            status = "worker crashed"
+            self.stop()
+        
+        if status == 'ok':
+            return result
+        
+        print(f"Post {label} could not be converted within its budget ({status}), using fallback conversion")
+        self.over_budget.append((label, status))
+        return fallback(*args)
+    
+    def report(self, stage):
+        """Print and clear the posts that needed the fallback conversion"""
+        if self.over_budget:
+            print(f"{len(self.over_budget)} posts used the fallback {stage}:")
+            for label, status in self.over_budget:
+                print(f"  {label}: {status}")
+        self.over_budget = []
+
+# Worker shared by all conversion stages in this process
+default_runner = BudgetRunner()
+atexit.register(default_runner.stop)
+
+def run_with_budget(func, args, fallback, label):
+    return default_runner.run(func, args, fallback, label)
+
+def report_over_budget(stage):
+    default_runner.report(stage)
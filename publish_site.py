@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+import sys
+import os
+import hashlib
+import shutil
+import subprocess
+import tarfile
+
+# Size of the chunks read when hashing files
+CHUNK_SIZE = 1024 * 1024
+
+def file_hash(path):
+    """Return the SHA-256 hex digest of a file, read in chunks"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            sha.update(chunk)
+    return sha.hexdigest()
+
+# Top-level dotfiles that are still published, so sync_posts.py can resume
+# from the published site
+PUBLISHED_DOTFILES = {'.blogger_sync.json'}
+
+def list_files(root_dir):
+    """Return the relative paths of all files under root_dir.
+    
+    Top-level dotfiles are skipped, as they were by the old `cp -r dir/*`,
+    so a .git directory in the output volume is never touched.
+    """
+    files = set()
+    for root, dirs, names in os.walk(root_dir):
+        if root == root_dir:
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            names = [n for n in names if not n.startswith('.') or n in PUBLISHED_DOTFILES]
+        for name in names:
+            files.add(os.path.relpath(os.path.join(root, name), root_dir))
+    return files
+
+def is_unchanged(src_path, dest_path):
+    """Compare two files by size and mtime, falling back to a content hash"""
+    src_stat = os.stat(src_path)
+    dest_stat = os.stat(dest_path)
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+        return True
+    if file_hash(src_path) != file_hash(dest_path):
+        return False
+    
+    # Same content: carry the mtime over so the next run skips the hash
+    os.utime(dest_path, ns=(dest_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return True
+
+def remove_file_ancestors(output_dir, rel_path):
+    """Remove stale files in output_dir that sit where rel_path needs a directory"""
+    parent = output_dir
+    for part in os.path.dirname(rel_path).split(os.sep):
+        if not part:
+            break
+        parent = os.path.join(parent, part)
+        if os.path.lexists(parent) and not os.path.isdir(parent):
+            os.remove(parent)
+            break
+        if os.path.islink(parent):
+            # A symlinked directory from an old build; replace it with a real one
+            os.remove(parent)
+            break
+
+def publish_site(site_dir, output_dir):
+    """Sync site_dir into output_dir, copying only changed files and removing stale ones"""
+    os.makedirs(output_dir, exist_ok=True)
+    
+    src_files = list_files(site_dir)
+    dest_files = list_files(output_dir)
+    copied = 0
+    
+    for rel_path in sorted(src_files):
+        src_path = os.path.join(site_dir, rel_path)
+        dest_path = os.path.join(output_dir, rel_path)
+        
+        if rel_path in dest_files and os.path.isfile(dest_path) and is_unchanged(src_path, dest_path):
+            continue
+        
+        # Copy next to the destination and rename, so readers never see a partial file
+        remove_file_ancestors(output_dir, rel_path)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        if os.path.isdir(dest_path) and not os.path.islink(dest_path):
+            shutil.rmtree(dest_path)
+        tmp_path = dest_path + '.part'
+        shutil.copy2(src_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+        copied += 1
+    
+    removed = 0
+    for rel_path in sorted(dest_files - src_files):
+        dest_path = os.path.join(output_dir, rel_path)
+        if os.path.lexists(dest_path) and not os.path.isdir(dest_path):
+            os.remove(dest_path)
+            removed += 1
+    
+    # Remove directories left empty by deleted files, deepest first
+    for root, dirs, names in os.walk(output_dir, topdown=False):
+        if root == output_dir:
+            continue
+        rel_root = os.path.relpath(root, output_dir)
+        if rel_root.split(os.sep)[0].startswith('.'):
+            continue
+        if not os.listdir(root):
+            os.rmdir(root)
+    
+    print(f"Published site: {copied} files copied, {removed} removed, "
+          f"{len(src_files) - copied} unchanged")
+
+def open_archive_stream(archive_path):
+    """Open the output for a .tar.gz or .tar.zst archive; '-' writes to stdout"""
+    out = sys.stdout.buffer if archive_path == '-' else None
+    
+    if archive_path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            zstandard = None
+        
+        if zstandard is not None:
+            raw = out or open(archive_path, 'wb')
+            return zstandard.ZstdCompressor().stream_writer(raw, closefd=out is None), 'w|', None
+        
+        # Fall back to the zstd command line tool when the module is not installed
+        if not shutil.which('zstd'):
+            raise RuntimeError("writing .tar.zst needs the zstandard module or the zstd command")
+        raw = out or open(archive_path, 'wb')
+        proc = subprocess.Popen(['zstd', '-q', '-c'], stdin=subprocess.PIPE, stdout=raw)
+        if out is None:
+            raw.close()
+        return proc.stdin, 'w|', proc
+    
+    return out or open(archive_path, 'wb'), 'w|gz', None
+
+def export_archive(site_dir, archive_path):
+    """Stream site_dir into a single .tar.gz or .tar.zst archive without a staging copy"""
+    stream, mode, proc = open_archive_stream(archive_path)
+    try:
+        with tarfile.open(fileobj=stream, mode=mode) as tar:
+            for rel_path in sorted(list_files(site_dir)):
+                tar.add(os.path.join(site_dir, rel_path), arcname=rel_path, recursive=False)
+    finally:
+        if stream is not sys.stdout.buffer:
+            stream.close()
+        if proc is not None and proc.wait() != 0:
+            raise RuntimeError(f"zstd exited with status {proc.returncode}")
+    
+    print(f"Exported site to {archive_path}", file=sys.stderr if archive_path == '-' else sys.stdout)
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == '--archive':
+        export_archive(sys.argv[2], sys.argv[3])
+    elif len(sys.argv) == 3:
+        publish_site(sys.argv[1], sys.argv[2])
+    else:
+        print("Usage: python publish_site.py <site_dir> <output_dir>")
+        print("       python publish_site.py --archive <site_dir> <archive.tar.gz|archive.tar.zst|->")
+        sys.exit(1)
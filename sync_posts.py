@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+import sys
+import os
+import re
+import json
+import glob
+import shutil
+import time
+import urllib.request
+import urllib.parse
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+from convert_posts import convert_entry, read_entry, NAMESPACES
+from html_to_markdown import process_markdown_files
+from organize_posts import organize_posts_by_date
+from post_budget import report_over_budget
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+
+# Name of the file, next to the posts directory, that remembers the last sync
+STATE_FILE = '.blogger_sync.json'
+
+# Longest wait in seconds between retries after failed syncs
+MAX_BACKOFF = 3600
+
+def parse_timestamp(value):
+    """Parse an Atom timestamp such as 2025-02-26T10:00:00.000-08:00"""
+    return datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+
+class BloggerFeedSource:
+    """Poll a Blogger Atom feed URL for entries updated since the last sync.
+    
+    Any Atom server that understands the updated-min parameter can be used,
+    including a local stand-in feed for testing.
+    """
+    # The posts feed only contains posts, so entries carry no kind category
+    posts_only = True
+    
+    def __init__(self, url, max_results=500):
+        self.url = url
+        self.max_results = max_results
+    
+    def feed_url(self, since):
+        parsed = urllib.parse.urlparse(self.url)
+        query = urllib.parse.parse_qs(parsed.query)
+        query['orderby'] = ['updated']
+        query['max-results'] = [str(self.max_results)]
+        if since:
+            query['updated-min'] = [since]
+        return urllib.parse.urlunparse(parsed._replace(query=urllib.parse.urlencode(query, doseq=True)))
+    
+    def fetch(self, since):
+        url = self.feed_url(since)
+        while url:
+            print(f"Fetching feed: {url}")
+            req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+            with urllib.request.urlopen(req, timeout=30) as response:
+                root = ET.parse(response).getroot()
+            
+            for entry in root.findall('entry', NAMESPACES):
+                yield entry
+            
+            # Follow pagination until the feed is exhausted
+            url = None
+            for link in root.findall('link', NAMESPACES):
+                if link.get('rel') == 'next':
+                    url = link.get('href')
+                    break
+
+class DirectoryFeedSource:
+    """Watch a drop directory (or a single file) for new Blogger exports.
+    
+    Each export is streamed entry by entry, so a full re-export only costs a
+    parse; entries not updated since the last sync are filtered out by the caller.
+    """
+    posts_only = False
+    
+    def __init__(self, path):
+        self.path = path
+        self.seen = {}
+    
+    def export_files(self):
+        if os.path.isfile(self.path):
+            return [self.path]
+        return sorted(glob.glob(os.path.join(self.path, '*.xml')))
+    
+    def fetch(self, since):
+        for xml_file in self.export_files():
+            mtime = os.path.getmtime(xml_file)
+            if self.seen.get(xml_file) == mtime:
+                continue
+            
+            print(f"Reading export: {xml_file}")
+            root = None
+            for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+                if event == 'start':
+                    if root is None:
+                        root = elem
+                    continue
+                if elem.tag == ATOM_NS + 'entry':
+                    yield elem
+                    # Drop converted entries so memory stays flat on large exports
+                    root.remove(elem)
+            
+            # Only mark the export as read once it parsed completely, so a
+            # half-written file is picked up again on the next poll
+            self.seen[xml_file] = mtime
+
+def make_source(location):
+    """Return a feed source for a feed URL or an export drop directory"""
+    if re.match(r'^https?://', location):
+        return BloggerFeedSource(location)
+    return DirectoryFeedSource(location)
+
+def load_state(state_path):
+    if os.path.exists(state_path):
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'last_updated': None, 'posts': {}}
+
+def save_state(state_path, state):
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, state_path)
+
+def seed_state(xml_file, posts_dir):
+    """Record the posts of an initial migration so later syncs can update them
+    
+    Streams the export that convert_posts.py converted and writes the sync
+    state for it: where each post was written and the newest update seen.
+    """
+    site_dir = os.path.dirname(os.path.abspath(posts_dir))
+    state = {'last_updated': None, 'posts': {}}
+    newest_dt = None
+    post_index = 0
+    
+    root = None
+    for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+        if elem.tag != ATOM_NS + 'entry':
+            continue
+        
+        post = read_entry(elem, post_index)
+        updated_elem = elem.find('updated', NAMESPACES)
+        if post is not None:
+            post_index += 1
+            filename = post['filename']
+            state['posts'][post['post_id']] = os.path.join(filename[0:4], filename[5:7], filename)
+            if updated_elem is not None and updated_elem.text:
+                updated_dt = parse_timestamp(updated_elem.text)
+                if newest_dt is None or updated_dt > newest_dt:
+                    state['last_updated'] = updated_elem.text.strip()
+                    newest_dt = updated_dt
+        root.remove(elem)
+    
+    save_state(os.path.join(site_dir, STATE_FILE), state)
+    print(f"Recorded {len(state['posts'])} posts in {STATE_FILE}")
+
+def sync_once(source, posts_dir, image_dir):
+    """Convert entries updated since the last sync and merge them into the site"""
+    site_dir = os.path.dirname(os.path.abspath(posts_dir))
+    state_path = os.path.join(site_dir, STATE_FILE)
+    state = load_state(state_path)
+    since = state['last_updated']
+    since_dt = parse_timestamp(since) if since else None
+    
+    # Convert into a staging directory so existing posts are left untouched
+    staging_dir = os.path.join(site_dir, '.sync_staging')
+    if os.path.exists(staging_dir):
+        shutil.rmtree(staging_dir)
+    os.makedirs(staging_dir)
+    os.makedirs(posts_dir, exist_ok=True)
+    os.makedirs(image_dir, exist_ok=True)
+    
+    newest = since
+    newest_dt = since_dt
+    converted = {}
+    
+    # Posts that could not be synced stay listed until a later sync succeeds
+    failed = state.setdefault('failed', {})
+    post_index = len(state['posts'])
+    
+    # Posts already on disk and in this batch, by filename, to detect two posts
+    # that would be written to the same file
+    owners = {os.path.basename(path): post_id for post_id, path in state['posts'].items()}
+    
+    for entry in source.fetch(since):
+        updated_elem = entry.find('updated', NAMESPACES)
+        if updated_elem is None or not updated_elem.text:
+            continue
+        updated_dt = parse_timestamp(updated_elem.text)
+        if since_dt is not None and updated_dt <= since_dt:
+            continue
+        
+        # Skipped and failed entries still count as seen, so one bad entry
+        # cannot hold back every later sync
+        if newest_dt is None or updated_dt > newest_dt:
+            newest = updated_elem.text.strip()
+            newest_dt = updated_dt
+        
+        post_id = None
+        try:
+            post = read_entry(entry, post_index, assume_post=source.posts_only)
+            if post is None:
+                continue
+            post_id = post['post_id']
+            
+            # Same title on the same day: keep both posts apart by their ID
+            filename = post['filename']
+            if owners.get(filename, post_id) != post_id:
+                filename = f"{filename[:-len('.md')]}-{post_id}.md"
+            
+            # Entries are only converted again when they changed, so fetch their
+            # images again too instead of keeping the copies from the last sync
+            post_path = convert_entry(entry, staging_dir, image_dir, post_index,
+                                      assume_post=source.posts_only, refresh_images=True, filename=filename)
+            post_index += 1
+        except Exception as e:
+            print(f"Skipping post {post_id or 'without ID'}: {e!r}")
+            failed[post_id or f"entry-{post_index}"] = repr(e)
+            continue
+        
+        # A post updated twice in one batch replaces its earlier staged file
+        previous = converted.get(post_id)
+        if previous and previous != filename and os.path.exists(os.path.join(staging_dir, previous)):
+            os.remove(os.path.join(staging_dir, previous))
+        
+        owners[filename] = post_id
+        converted[post_id] = os.path.basename(post_path)
+    
+    report_over_budget("HTML cleanup")
+    
+    if not converted:
+        shutil.rmtree(staging_dir)
+        if newest != since or failed:
+            state['last_updated'] = newest
+            save_state(state_path, state)
+        print("No new or updated posts")
+        return 0
+    
+    process_markdown_files(staging_dir)
+    
+    moved = 0
+    for post_id, filename in converted.items():
+        try:
+            # Remove the previous version of an updated post, its title may have changed
+            old_path = state['posts'].get(post_id)
+            if old_path and os.path.exists(os.path.join(posts_dir, old_path)):
+                os.remove(os.path.join(posts_dir, old_path))
+            
+            shutil.move(os.path.join(staging_dir, filename), os.path.join(posts_dir, filename))
+        except Exception as e:
+            print(f"Skipping post {post_id}: {e!r}")
+            failed[post_id] = repr(e)
+            # Do not leave a half-placed post in the root of the posts directory
+            stray_path = os.path.join(posts_dir, filename)
+            if os.path.exists(stray_path):
+                os.remove(stray_path)
+            continue
+        state['posts'][post_id] = os.path.join(filename[0:4], filename[5:7], filename)
+        failed.pop(post_id, None)
+        moved += 1
+    
+    shutil.rmtree(staging_dir)
+    
+    # Move the new posts into place and rebuild the affected archive indexes
+    organize_posts_by_date(posts_dir, clean=False)
+    
+    state['last_updated'] = newest
+    save_state(state_path, state)
+    
+    if failed:
+        print(f"{len(failed)} posts could not be synced so far: {', '.join(sorted(failed))}")
+    print(f"Synced {moved} posts")
+    return moved
+
+def run_sync(source, posts_dir, image_dir, interval=300):
+    """Sync repeatedly every interval seconds, or once if interval is 0
+    
+    A failed sync (network error, bad feed, ...) is logged and retried with
+    exponential backoff instead of stopping the daemon. Returns False if the
+    last sync failed.
+    """
+    failures = 0
+    try:
+        while True:
+            try:
+                sync_once(source, posts_dir, image_dir)
+                failures = 0
+            except Exception as e:
+                failures += 1
+                print(f"Sync failed: {e!r}")
+            
+            if not interval:
+                break
+            
+            delay = interval
+            if failures:
+                delay = min(interval * 2 ** failures, max(interval, MAX_BACKOFF))
+                print(f"Retrying in {delay} seconds")
+            time.sleep(delay)
+    except KeyboardInterrupt:
+        print("Stopping sync")
+    
+    return failures == 0
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == '--seed':
+        seed_state(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+    
+    if len(sys.argv) not in (4, 5):
+        print("Usage: python sync_posts.py <feed_url|export_dir> <posts_dir> <image_dir> [interval_seconds]")
+        print("       python sync_posts.py --seed <blogger_xml_file> <posts_dir>")
+        print("An interval of 0 runs a single sync and exits (default: 300)")
+        print("--seed records the posts of an initial migration for later syncs")
+        sys.exit(1)
+    source = make_source(sys.argv[1])
+    posts_dir = sys.argv[2]
+    image_dir = sys.argv[3]
+    interval = int(sys.argv[4]) if len(sys.argv) == 5 else 300
+    
+    if not run_sync(source, posts_dir, image_dir, interval):
+        sys.exit(1)
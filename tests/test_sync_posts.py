@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+import unittest.mock
+import urllib.parse
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import sync_posts
+from sync_posts import BloggerFeedSource, sync_once, STATE_FILE
+
+FEED_TEMPLATE = """<?xml version='1.0' encoding='UTF-8'?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>Test Blog</title>{entries}</feed>
+"""
+
+ENTRY_TEMPLATE = """<entry><id>tag:blogger.com,1999:blog-1.post-{post_id}</id>
+<published>{published}</published><updated>{updated}</updated>
+<category scheme="http://www.blogger.com/atom/ns#" term="testing" />
+<title>{title}</title><content type="html">&lt;p&gt;{body}&lt;/p&gt;</content></entry>"""
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """Serve the feed held by the server and record the queries it receives"""
+    def do_GET(self):
+        self.server.queries.append(urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query))
+        body = self.server.feed.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/atom+xml')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+def make_feed(*entries):
+    return FEED_TEMPLATE.format(entries=''.join(ENTRY_TEMPLATE.format(**entry) for entry in entries))
+
+class BloggerFeedSourceTest(unittest.TestCase):
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), FeedHandler)
+        self.server.feed = ''
+        self.server.queries = []
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/feeds/posts/default"
+        
+        self.site_dir = tempfile.mkdtemp()
+        self.posts_dir = os.path.join(self.site_dir, '_posts')
+        self.image_dir = os.path.join(self.site_dir, 'assets', 'images')
+    
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.site_dir)
+    
+    def post_files(self):
+        files = []
+        for root, _, names in os.walk(self.posts_dir):
+            files.extend(name for name in names if name.endswith('.md'))
+        return sorted(files)
+    
+    def test_converts_only_entries_updated_since_last_sync(self):
+        first = {'post_id': 1, 'published': '2025-01-10T10:00:00.000-08:00',
+                 'updated': '2025-01-10T10:00:00.000-08:00', 'title': 'First post', 'body': 'Hello from the first post'}
+        second = {'post_id': 2, 'published': '2025-02-10T10:00:00.000-08:00',
+                  'updated': '2025-02-10T10:00:00.000-08:00', 'title': 'Second post', 'body': 'Hello from the second post'}
+        self.server.feed = make_feed(first)
+        source = BloggerFeedSource(self.url)
+        
+        self.assertEqual(sync_once(source, self.posts_dir, self.image_dir), 1)
+        self.assertNotIn('updated-min', self.server.queries[-1])
+        self.assertEqual(self.post_files(), ['2025-01-10-first-post.md'])
+        
+        # The feed still lists the first post, but only the new one is converted
+        self.server.feed = make_feed(first, second)
+        self.assertEqual(sync_once(source, self.posts_dir, self.image_dir), 1)
+        self.assertEqual(self.server.queries[-1]['updated-min'], ['2025-01-10T10:00:00.000-08:00'])
+        self.assertEqual(self.post_files(), ['2025-01-10-first-post.md', '2025-02-10-second-post.md'])
+        
+        self.assertEqual(sync_once(source, self.posts_dir, self.image_dir), 0)
+        
+        with open(os.path.join(self.site_dir, STATE_FILE), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        self.assertEqual(state['last_updated'], '2025-02-10T10:00:00.000-08:00')
+        self.assertEqual(set(state['posts']), {'1', '2'})
+    
+    def test_retitled_post_replaces_previous_file(self):
+        post = {'post_id': 1, 'published': '2025-01-10T10:00:00.000-08:00',
+                'updated': '2025-01-10T10:00:00.000-08:00', 'title': 'Old title', 'body': 'Some post content'}
+        self.server.feed = make_feed(post)
+        source = BloggerFeedSource(self.url)
+        sync_once(source, self.posts_dir, self.image_dir)
+        
+        post.update(updated='2025-01-12T10:00:00.000-08:00', title='New title')
+        self.server.feed = make_feed(post)
+        self.assertEqual(sync_once(source, self.posts_dir, self.image_dir), 1)
+        self.assertEqual(self.post_files(), ['2025-01-10-new-title.md'])
+        
+        with open(os.path.join(self.posts_dir, '2025', '01', '2025-01-10-new-title.md'), 'r', encoding='utf-8') as f:
+            self.assertIn('Some post content', f.read())
+    
+    def test_posts_with_same_title_and_date_are_kept_apart(self):
+        first = {'post_id': 1, 'published': '2025-01-10T09:00:00.000-08:00',
+                 'updated': '2025-01-10T09:00:00.000-08:00', 'title': 'Weekly update', 'body': 'Morning edition'}
+        second = {'post_id': 2, 'published': '2025-01-10T17:00:00.000-08:00',
+                  'updated': '2025-01-10T17:00:00.000-08:00', 'title': 'Weekly update', 'body': 'Evening edition'}
+        self.server.feed = make_feed(first, second)
+        source = BloggerFeedSource(self.url)
+        
+        self.assertEqual(sync_once(source, self.posts_dir, self.image_dir), 2)
+        self.assertEqual(self.post_files(), ['2025-01-10-weekly-update-2.md', '2025-01-10-weekly-update.md'])
+        self.assertEqual([name for name in os.listdir(self.posts_dir) if name.endswith('.md')], [])
+        
+        # Editing the second post keeps it in its own file
+        second.update(updated='2025-01-11T10:00:00.000-08:00', body='Evening edition, revised')
+        self.server.feed = make_feed(first, second)
+        self.assertEqual(sync_once(source, self.posts_dir, self.image_dir), 1)
+        self.assertEqual(self.post_files(), ['2025-01-10-weekly-update-2.md', '2025-01-10-weekly-update.md'])
+        with open(os.path.join(self.posts_dir, '2025', '01', '2025-01-10-weekly-update.md'), 'r', encoding='utf-8') as f:
+            self.assertIn('Morning edition', f.read())
+    
+    def test_failing_entry_is_skipped_and_state_still_saved(self):
+        good = {'post_id': 1, 'published': '2025-01-10T10:00:00.000-08:00',
+                'updated': '2025-01-10T10:00:00.000-08:00', 'title': 'Good post', 'body': 'This one converts'}
+        bad = {'post_id': 2, 'published': '2025-01-11T10:00:00.000-08:00',
+               'updated': '2025-01-11T10:00:00.000-08:00', 'title': 'Bad post', 'body': 'This one fails'}
+        self.server.feed = make_feed(good, bad)
+        source = BloggerFeedSource(self.url)
+        convert_entry = sync_posts.convert_entry
+        
+        def failing_convert_entry(entry, *args, **kwargs):
+            if 'Bad post' in ''.join(entry.itertext()):
+                raise ValueError("broken entry")
+            return convert_entry(entry, *args, **kwargs)
+        
+        with unittest.mock.patch.object(sync_posts, 'convert_entry', failing_convert_entry):
+            self.assertEqual(sync_once(source, self.posts_dir, self.image_dir), 1)
+        self.assertEqual(self.post_files(), ['2025-01-10-good-post.md'])
+        
+        with open(os.path.join(self.site_dir, STATE_FILE), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        self.assertEqual(state['last_updated'], '2025-01-11T10:00:00.000-08:00')
+        self.assertEqual(set(state['posts']), {'1'})
+        self.assertEqual(set(state['failed']), {'2'})
+        
+        # The next poll moves on instead of retrying the same batch
+        self.assertEqual(sync_once(source, self.posts_dir, self.image_dir), 0)
+
+if __name__ == '__main__':
+    unittest.main()